@@ -1,44 +1,47 @@
 from __future__ import annotations
 
+import atexit
 from datetime import datetime
-import hashlib
 from email.header import Header
 from email.mime.text import MIMEText
 from email.utils import formataddr, parseaddr
-from html import escape
-from typing import Sequence
+from functools import lru_cache
+from typing import TYPE_CHECKING, NamedTuple, Sequence
+import zlib
 
-import smtplib
 from loguru import logger
 
 from feeds import FeedPost
 
+if TYPE_CHECKING:
+    import smtplib
+
 FRAMEWORK = """\
 <!DOCTYPE html>
 <html>
 <head>
   <meta charset="utf-8">
   <style>
-    body {{ font-family: Arial, sans-serif; }}
-    table.post {{ width: 100%; border: 1px solid #ddd; border-left: 6px solid #444; border-radius: 6px; padding: 16px; background: #f9f9f9; }}
-    .meta {{ color: #666; font-size: 14px; margin-bottom: 12px; }}
-    .translation {{ margin-top: 12px; padding: 12px; background: #fff6e6; border-radius: 6px; }}
-    .source-header {{ display: flex; gap: 8px; flex-wrap: wrap; align-items: center; margin-bottom: 8px; }}
-    .source-badge {{ color: #fff; font-size: 13px; padding: 4px 10px; border-radius: 999px; font-weight: bold; }}
-    .source-extra {{ color: #444; font-size: 13px; }}
-    .source-extra span {{ margin-right: 10px; }}
-    .source-tags {{ margin-top: 4px; }}
-    .source-tag {{ display: inline-block; background: #e4e4e4; color: #444; border-radius: 999px; padding: 2px 8px; font-size: 12px; margin-right: 4px; }}
-    .summary-section {{ border: 1px solid #ddd; border-radius: 10px; padding: 16px; background: #fff; margin-bottom: 24px; }}
-    .summary-header {{ font-size: 18px; font-weight: bold; margin-bottom: 12px; color: #222; }}
-    .summary-item {{ padding: 10px 0; border-top: 1px solid #eee; }}
-    .summary-item:first-of-type {{ border-top: none; }}
-    .summary-blog {{ font-size: 16px; font-weight: bold; color: #333; margin-bottom: 4px; }}
-    .summary-title {{ font-size: 14px; font-weight: 600; color: #222; margin-bottom: 4px; }}
-    .summary-meta {{ font-size: 12px; color: #777; margin-bottom: 4px; }}
-    .summary-text {{ font-size: 14px; color: #555; margin-bottom: 6px; }}
-    .summary-link {{ font-size: 13px; color: #0066cc; text-decoration: none; }}
-    .summary-link:hover {{ text-decoration: underline; }}
+    body { font-family: Arial, sans-serif; }
+    table.post { width: 100%; border: 1px solid #ddd; border-left: 6px solid #444; border-radius: 6px; padding: 16px; background: #f9f9f9; }
+    .meta { color: #666; font-size: 14px; margin-bottom: 12px; }
+    .translation { margin-top: 12px; padding: 12px; background: #fff6e6; border-radius: 6px; }
+    .source-header { display: flex; gap: 8px; flex-wrap: wrap; align-items: center; margin-bottom: 8px; }
+    .source-badge { color: #fff; font-size: 13px; padding: 4px 10px; border-radius: 999px; font-weight: bold; }
+    .source-extra { color: #444; font-size: 13px; }
+    .source-extra span { margin-right: 10px; }
+    .source-tags { margin-top: 4px; }
+    .source-tag { display: inline-block; background: #e4e4e4; color: #444; border-radius: 999px; padding: 2px 8px; font-size: 12px; margin-right: 4px; }
+    .summary-section { border: 1px solid #ddd; border-radius: 10px; padding: 16px; background: #fff; margin-bottom: 24px; }
+    .summary-header { font-size: 18px; font-weight: bold; margin-bottom: 12px; color: #222; }
+    .summary-item { padding: 10px 0; border-top: 1px solid #eee; }
+    .summary-item:first-of-type { border-top: none; }
+    .summary-blog { font-size: 16px; font-weight: bold; color: #333; margin-bottom: 4px; }
+    .summary-title { font-size: 14px; font-weight: 600; color: #222; margin-bottom: 4px; }
+    .summary-meta { font-size: 12px; color: #777; margin-bottom: 4px; }
+    .summary-text { font-size: 14px; color: #555; margin-bottom: 6px; }
+    .summary-link { font-size: 13px; color: #0066cc; text-decoration: none; }
+    .summary-link:hover { text-decoration: underline; }
   </style>
 </head>
 <body>
@@ -53,6 +56,9 @@ FRAMEWORK = """\
 </html>
 """
 
+# Split once at import so wrapping the digest never re-parses the CSS-heavy shell.
+_FRAMEWORK_PREFIX, _, _FRAMEWORK_SUFFIX = FRAMEWORK.partition("{content}")
+
 EMPTY_BLOCK = """\
 <table class="post">
   <tr><td style="font-size:18px; font-weight:bold; color:#333;">No new posts today 🎉</td></tr>
@@ -62,7 +68,20 @@ EMPTY_BLOCK = """\
 </table>
 """
 
-POST_TEMPLATE = """\
+def _post_html(
+    *,
+    anchor: str,
+    accent: str,
+    url: str,
+    title: str,
+    source_header: str,
+    published: str,
+    source: str,
+    original_html: str,
+    target_language: str,
+    translation_html: str,
+) -> str:
+    return f"""\
 <a id="{anchor}" name="{anchor}" style="display:block;height:1px;line-height:1px;"></a>
 <table class="post" id="{anchor}-section" style="width:100%; border:1px solid #ddd; border-left:6px solid {accent}; border-radius:6px; padding:16px; background:#f9f9f9; margin-bottom:24px; line-height:1.6;">
   <tr>
@@ -75,13 +94,7 @@ POST_TEMPLATE = """\
   </tr>
   <tr>
     <td>
-      <div class="source-header">
-        {source_badge}
-        <div class="source-extra">
-          {source_extra}
-        </div>
-      </div>
-      {source_tags}
+      {source_header}
     </td>
   </tr>
   <tr>
@@ -103,15 +116,22 @@ POST_TEMPLATE = """\
 </table>
 """
 
-SUMMARY_SECTION_TEMPLATE = """\
+
+_SUMMARY_SECTION_OPEN = """\
 <a id="overview" name="overview" style="display:block;height:1px;line-height:1px;"></a>
 <div class="summary-section" style="border:1px solid #ddd; border-radius:10px; padding:16px; background:#fff; margin-bottom:24px;">
   <div class="summary-header" style="font-size:18px; font-weight:bold; margin-bottom:12px; color:#222;">快速摘要</div>
-  {items}
+  """
+
+_SUMMARY_SECTION_CLOSE = """
 </div>
 """
 
-SUMMARY_ITEM_TEMPLATE = """\
+
+def _summary_item_html(
+    *, blog_name: str, author_html: str, anchor: str, title: str, summary: str
+) -> str:
+    return f"""\
 <div class="summary-item" style="padding:12px 0; border-top:1px solid #eee;">
   <h3 style="margin:0 0 6px; font-size:16px; color:#222;">{blog_name}</h3>
   {author_html}
@@ -124,53 +144,78 @@ SUMMARY_ITEM_TEMPLATE = """\
 </div>
 """
 
+
+# Same output as html.escape(quote=True), in one C-level pass instead of five replaces.
+_HTML_ESCAPE_TABLE = str.maketrans(
+    {"&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;", "'": "&#x27;"}
+)
+
+
+def _escape_text(text: str) -> str:
+    return text.translate(_HTML_ESCAPE_TABLE)
+
+
+@lru_cache(maxsize=1024)
+def _esc(text: str) -> str:
+    return _escape_text(text)
+
+
+@lru_cache(maxsize=512)
 def _format_datetime(dt_obj: datetime) -> str:
     local = dt_obj.astimezone()
     return local.strftime("%Y-%m-%d %H:%M %Z")
 
 
+# Every separator str.splitlines() breaks on, folded to "\n" ("\r\n" is handled first).
+_LINE_BREAKS = str.maketrans(dict.fromkeys("\r\v\f\x1c\x1d\x1e\x85\u2028\u2029", "\n"))
+
+
 def _render_translation(text: str | None) -> str:
     if not text:
         return "<em>No translation generated.</em>"
-    return "<br/>".join(escape(line) for line in text.splitlines())
+    text = text.replace("\r\n", "\n").translate(_LINE_BREAKS)
+    if text.endswith("\n"):
+        text = text[:-1]
+    return _escape_text(text).replace("\n", "<br/>")
+
+
+@lru_cache(maxsize=256)
+def _accent_for_seed(seed: str) -> str:
+    hue = (zlib.crc32(seed.encode("utf-8", "ignore")) & 0xFF) / 255 * 360
+    return f"hsl({hue:.0f}, 65%, 52%)"
 
 
 def _resolve_accent(post: FeedPost) -> str:
     if post.source_accent:
         return post.source_accent
-    seed = (post.source_name or post.source or post.feed_url or post.url or "").encode(
-        "utf-8", "ignore"
-    )
-    digest = hashlib.md5(seed).hexdigest()
-    hue = int(digest[:2], 16) / 255 * 360
-    return f"hsl({hue:.0f}, 65%, 52%)"
+    return _accent_for_seed(post.source_name or post.source or post.feed_url or post.url or "")
 
 
 def _render_source_badge(post: FeedPost, accent: str) -> str:
-    label = escape(post.source_name or post.source or "Unknown source")
+    label = _esc(post.source_name or post.source or "Unknown source")
     return f'<span class="source-badge" style="background:{accent};">{label}</span>'
 
 
+def _nz(value: str | None) -> str:
+    return value.strip() if value else ""
+
+
 def _render_source_extra(post: FeedPost) -> str:
-    parts = []
-    owner = (post.source_owner or "").strip()
-    category = (post.source_category or "").strip()
-    site = (post.source_site or "").strip()
-    description = (post.source_description or "").strip()
+    owner = _nz(post.source_owner)
+    category = _nz(post.source_category)
+    site = _nz(post.source_site)
+    description = _nz(post.source_description)
 
     if owner and category:
-        parts.append(f"{escape(owner)} ({escape(category)})")
-    elif owner:
-        parts.append(f"{escape(owner)}")
-    elif category:
-        parts.append(escape(category))
-    if site:
-        parts.append(escape(site))
-    if description:
-        parts.append(escape(description))
-
-    if not parts:
-        return "Origin details unavailable"
+        owner_category = f"{_esc(owner)} ({_esc(category)})"
+    else:
+        owner_category = _esc(owner or category)
+    parts = tuple(
+        part
+        for part in (owner_category, site and _esc(site), description and _esc(description))
+        if part
+    )
+
     return " &middot; ".join(parts)
 
 
@@ -178,27 +223,18 @@ def _render_source_tags(post: FeedPost) -> str:
     if not post.source_tags:
         return ""
     chips = "".join(
-        f'<span class="source-tag">{escape(tag)}</span>' for tag in post.source_tags
+        f'<span class="source-tag">{_esc(tag)}</span>' for tag in post.source_tags
     )
     return f'<div class="source-tags">{chips}</div>'
 
 
 def _anchor_id(post: FeedPost) -> str:
+    # Anchors only need to be unique within one email, so the builtin hash is enough.
     published = (
         post.published.isoformat() if isinstance(post.published, datetime) else ""
     )
-    seed = "||".join(
-        [
-            post.id or "",
-            post.url or "",
-            post.title or "",
-            post.source or "",
-            post.feed_url or "",
-            published,
-        ]
-    ).encode("utf-8", "ignore")
-    digest = hashlib.md5(seed).hexdigest()[:12]
-    return f"post-{digest}"
+    seed = (post.id, post.url, post.title, post.source, post.feed_url, published)
+    return f"post-{hash(seed) & 0xFFFFFFFFFFFF:012x}"
 
 
 def _render_summary_text(post: FeedPost) -> str:
@@ -210,57 +246,173 @@ def _render_summary_text(post: FeedPost) -> str:
     ).strip()
     if not flattened:
         return "<em>沒有可用的摘要</em>"
-    return escape(flattened)
+    return _escape_text(flattened)
+
+
+def _render_source_header(badge: str, extra: str, tags_html: str) -> str:
+    extra_html = ""
+    if extra:
+        extra_html = f"""
+        <div class="source-extra">
+          {extra}
+        </div>"""
+    header = f"""\
+<div class="source-header">
+        {badge}{extra_html}
+      </div>"""
+    if tags_html:
+        header += f"""
+      {tags_html}"""
+    return header
+
+
+class _SourceChrome(NamedTuple):
+    accent: str
+    header: str
+    author_html: str
+    blog_name: str
+    source: str
+
+
+def _render_source_chrome(post: FeedPost, accent: str) -> _SourceChrome:
+    author_html = ""
+    if post.source_owner:
+        author_html = f'<div style="font-size:12px; color:#777; margin-bottom:4px;">{_esc(post.source_owner)}</div>'
+    return _SourceChrome(
+        accent=accent,
+        header=_render_source_header(
+            _render_source_badge(post, accent),
+            _render_source_extra(post),
+            _render_source_tags(post),
+        ),
+        author_html=author_html,
+        blog_name=_esc(post.source_name or post.source or "Unknown"),
+        source=_esc(post.source or "Unknown"),
+    )
 
 
 def render_email(posts: Sequence[FeedPost], target_language: str) -> str:
     if not posts:
-        return FRAMEWORK.format(content=EMPTY_BLOCK)
+        return f"{_FRAMEWORK_PREFIX}{EMPTY_BLOCK}{_FRAMEWORK_SUFFIX}"
 
+    language = _esc(target_language)
+    # Source metadata is identical for every post of a feed; render it once per source.
+    chrome_by_source: dict[tuple, _SourceChrome] = {}
     summary_items: list[str] = []
-    blocks = []
+    blocks: list[str] = []
     for post in posts:
         accent = _resolve_accent(post)
-        badge = _render_source_badge(post, accent)
-        source_extra = _render_source_extra(post)
-        tags_html = _render_source_tags(post)
+        source_key = (
+            accent,
+            post.source_name,
+            post.source,
+            post.source_owner,
+            post.source_category,
+            post.source_site,
+            post.source_description,
+            tuple(post.source_tags or ()),
+        )
+        chrome = chrome_by_source.get(source_key)
+        if chrome is None:
+            chrome = chrome_by_source[source_key] = _render_source_chrome(post, accent)
         anchor = _anchor_id(post)
-        author_html = ""
-        if post.source_owner:
-            author_html = f'<div style="font-size:12px; color:#777; margin-bottom:4px;">{escape(post.source_owner)}</div>'
+        title = _escape_text(post.title or "Untitled")
         summary_items.append(
-            SUMMARY_ITEM_TEMPLATE.format(
-                blog_name=escape(post.source_name or post.source or "Unknown"),
-                title=escape(post.title or "Untitled"),
+            _summary_item_html(
+                blog_name=chrome.blog_name,
+                title=title,
                 summary=_render_summary_text(post),
                 anchor=anchor,
-                author_html=author_html,
+                author_html=chrome.author_html,
             )
         )
+        if blocks:
+            blocks.append("<br><br>")
         blocks.append(
-            POST_TEMPLATE.format(
-                title=escape(post.title or "Untitled"),
+            _post_html(
+                title=title,
                 url=post.url,
                 published=_format_datetime(post.published),
                 original_html=post.content_html,
-                source=escape(post.source or "Unknown"),
-                target_language=escape(target_language),
+                source=chrome.source,
+                target_language=language,
                 translation_html=_render_translation(post.translation),
-                source_badge=badge,
-                source_extra=source_extra,
-                source_tags=tags_html,
-                accent=accent,
+                source_header=chrome.header,
+                accent=chrome.accent,
                 anchor=anchor,
             )
         )
-    summary_html = SUMMARY_SECTION_TEMPLATE.format(items="".join(summary_items))
-    details_html = "<br><br>".join(blocks)
-    return FRAMEWORK.format(content=f"{summary_html}<br><br>{details_html}")
+    return "".join(
+        [
+            _FRAMEWORK_PREFIX,
+            _SUMMARY_SECTION_OPEN,
+            *summary_items,
+            _SUMMARY_SECTION_CLOSE,
+            "<br><br>",
+            *blocks,
+            _FRAMEWORK_SUFFIX,
+        ]
+    )
+
+
+MAX_RECIPIENTS_PER_MESSAGE = 50
+
+_SMTP_CONNECTIONS: dict[tuple[str, int, str], smtplib.SMTP] = {}
+
+
+def _get_smtp(smtp_server: str, smtp_port: int, sender: str, password: str) -> smtplib.SMTP:
+    import smtplib
+
+    key = (smtp_server, smtp_port, sender)
+    server = _SMTP_CONNECTIONS.get(key)
+    if server is not None:
+        try:
+            if server.noop()[0] == 250:
+                return server
+        except (smtplib.SMTPException, OSError) as exc:
+            logger.debug(f"Cached SMTP connection is stale: {exc}")
+        _SMTP_CONNECTIONS.pop(key, None)
+        server.close()
+
+    server = None
+    try:
+        server = smtplib.SMTP(smtp_server, smtp_port, timeout=30)
+        server.starttls()
+    except Exception as exc:
+        logger.debug(f"Falling back to SMTPS: {exc}")
+        if server is not None:
+            server.close()
+        server = smtplib.SMTP_SSL(smtp_server, smtp_port, timeout=30)
+
+    try:
+        server.login(sender, password)
+    except BaseException:
+        server.close()
+        raise
+    _SMTP_CONNECTIONS[key] = server
+    return server
+
+
+def close_smtp() -> None:
+    if not _SMTP_CONNECTIONS:
+        return
+    import smtplib
+
+    while _SMTP_CONNECTIONS:
+        _, server = _SMTP_CONNECTIONS.popitem()
+        try:
+            server.quit()
+        except (smtplib.SMTPException, OSError) as exc:
+            logger.debug(f"Ignoring error while closing SMTP connection: {exc}")
+            server.close()
+
+
+atexit.register(close_smtp)
 
 
 def send_email(
     sender: str,
-    receiver: str,
+    receivers: Sequence[str],
     password: str,
     smtp_server: str,
     smtp_port: int,
@@ -271,18 +423,20 @@ def send_email(
         name, email = parseaddr(addr)
         return formataddr((Header(name or "", "utf-8").encode(), email))
 
+    if not receivers:
+        raise ValueError("No email receivers given")
+
     msg = MIMEText(html, "html", "utf-8")
     msg["From"] = _format_addr(f"Blog Pusher <{sender}>")
-    msg["To"] = _format_addr(f"You <{receiver}>")
     msg["Subject"] = Header(subject, "utf-8").encode()
-
-    try:
-        server = smtplib.SMTP(smtp_server, smtp_port, timeout=30)
-        server.starttls()
-    except Exception as exc:
-        logger.debug(f"Falling back to SMTPS: {exc}")
-        server = smtplib.SMTP_SSL(smtp_server, smtp_port, timeout=30)
-
-    server.login(sender, password)
-    server.sendmail(sender, [receiver], msg.as_string())
-    server.quit()
+    # Recipients travel in RCPT TO only; never list subscribers to each other.
+    if len(receivers) == 1:
+        msg["To"] = _format_addr(f"You <{receivers[0]}>")
+    else:
+        msg["To"] = "undisclosed-recipients:;"
+
+    server = _get_smtp(smtp_server, smtp_port, sender, password)
+    # One DATA phase per batch of RCPT TO commands over the shared session.
+    for start in range(0, len(receivers), MAX_RECIPIENTS_PER_MESSAGE):
+        batch = list(receivers[start : start + MAX_RECIPIENTS_PER_MESSAGE])
+        server.send_message(msg, sender, batch)
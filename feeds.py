@@ -1,18 +1,31 @@
 from __future__ import annotations
 
-import calendar
+import atexit
+import hashlib
+import json
+import shelve
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
+from functools import lru_cache
 from html import escape as html_escape
-from typing import Any, List, Mapping, Optional
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Mapping, Optional, Sequence, Tuple
 
-import feedparser
-from bs4 import BeautifulSoup
 from loguru import logger
 
+if TYPE_CHECKING:
+    import requests
 
-@dataclass
+USER_AGENT = "BlogPusher/0.1 (+https://github.com/SupernovaTitanium/blog-stalking)"
+REQUEST_TIMEOUT = 15
+DEFAULT_FEED_CACHE = "~/.cache/blog-stalking/etags.json"
+DEFAULT_TEXT_CACHE = "~/.cache/blog-stalking/text"
+
+
+@dataclass(slots=True)
 class FeedPost:
     id: str
     url: str
@@ -36,16 +49,20 @@ def _parse_datetime(struct_time: time.struct_time | None) -> datetime | None:
     if struct_time is None:
         return None
     try:
-        timestamp = calendar.timegm(struct_time)
-    except (OverflowError, ValueError):
+        year, month, day, hour, minute, second = struct_time[:6]
+        # struct_time allows leap seconds (60, 61); datetime does not.
+        return datetime(year, month, day, hour, minute, min(second, 59), tzinfo=timezone.utc)
+    except (TypeError, ValueError):
         return None
-    return datetime.fromtimestamp(timestamp, tz=timezone.utc)
+
+
+_DATE_FIELDS = ("published_parsed", "updated_parsed", "created_parsed")
+_HTML_FIELDS = ("content", "summary", "summary_detail", "description")
 
 
 def _extract_entry_datetime(entry: Mapping[str, Any]) -> datetime | None:
-    for field in ("published_parsed", "updated_parsed", "created_parsed"):
-        struct_time = entry.get(field)
-        parsed = _parse_datetime(struct_time)
+    for field in _DATE_FIELDS:
+        parsed = _parse_datetime(entry.get(field))
         if parsed is not None:
             return parsed
     return None
@@ -70,29 +87,160 @@ def _coerce_html_value(candidate: Any) -> str:
 
 
 def _extract_entry_html(entry: Mapping[str, Any]) -> str:
-    html_candidates: list[str] = []
-    content = entry.get("content")
-    value = _coerce_html_value(content)
-    if value:
-        html_candidates.append(value)
-    for field in ("summary", "summary_detail", "description"):
+    for field in _HTML_FIELDS:
         value = _coerce_html_value(entry.get(field))
         if value:
-            html_candidates.append(value)
-            break
-    for html in html_candidates:
-        if html:
-            return html
+            return value
     return ""
 
 
+def _entry_content_type(entry: Mapping[str, Any]) -> str:
+    content = entry.get("content")
+    if isinstance(content, (list, tuple)) and content:
+        detail = content[0]
+    else:
+        detail = entry.get("summary_detail")
+    if isinstance(detail, dict):
+        return detail.get("type") or ""
+    return getattr(detail, "type", "") or ""
+
+
+@lru_cache(maxsize=1)
+def _text_extractor() -> Tuple[str, Callable[[str], str]]:
+    # The name tags text-cache entries, so switching parsers never serves the other's output.
+    try:
+        from selectolax.lexbor import LexborHTMLParser
+    except ImportError:
+        from bs4 import BeautifulSoup
+
+        return "bs4-lxml", lambda raw_html: BeautifulSoup(raw_html, "lxml").get_text("\n")
+
+    def extract(raw_html: str) -> str:
+        tree = LexborHTMLParser(raw_html)
+        # bs4's get_text skips script/style bodies; match that.
+        tree.strip_tags(["script", "style"])
+        return tree.text(separator="\n")
+
+    return "selectolax-lexbor", extract
+
+
+_TEXT_CACHE: Optional[shelve.Shelf] = None
+_TEXT_CACHE_LOCK = threading.Lock()
+
+
+def open_text_cache(path: str | Path) -> None:
+    global _TEXT_CACHE
+    cache_path = Path(path).expanduser()
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    with _TEXT_CACHE_LOCK:
+        if _TEXT_CACHE is None:
+            _TEXT_CACHE = shelve.open(str(cache_path))
+            atexit.register(close_text_cache)
+
+
+def close_text_cache() -> None:
+    global _TEXT_CACHE
+    with _TEXT_CACHE_LOCK:
+        if _TEXT_CACHE is not None:
+            _TEXT_CACHE.close()
+            _TEXT_CACHE = None
+
+
+def _html_to_text(raw_html: str) -> str:
+    if not raw_html:
+        return ""
+    extractor_name, extract = _text_extractor()
+    if _TEXT_CACHE is None:
+        return extract(raw_html).strip()
+
+    # Feeds re-serve the same items on every poll; skip the parser for HTML seen before.
+    key = hashlib.blake2b(
+        f"{extractor_name}|{raw_html}".encode("utf-8"), digest_size=16
+    ).hexdigest()
+    with _TEXT_CACHE_LOCK:
+        text = _TEXT_CACHE.get(key) if _TEXT_CACHE is not None else None
+    if text is None:
+        text = extract(raw_html).strip()
+        with _TEXT_CACHE_LOCK:
+            if _TEXT_CACHE is not None:
+                _TEXT_CACHE[key] = text
+    return text
+
+
+_SESSION: Optional[requests.Session] = None
+_SESSION_LOCK = threading.Lock()
+
+
+def _get_session() -> requests.Session:
+    global _SESSION
+    with _SESSION_LOCK:
+        if _SESSION is None:
+            import requests
+            from requests.adapters import HTTPAdapter, Retry
+
+            session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=16,
+                pool_maxsize=16,
+                max_retries=Retry(total=3, backoff_factor=0.3),
+            )
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.headers["User-Agent"] = USER_AGENT
+            _SESSION = session
+    return _SESSION
+
+
+FeedState = Dict[str, Dict[str, str]]
+
+
+def load_feed_state(path: str | Path) -> FeedState:
+    state_path = Path(path).expanduser()
+    if not state_path.exists():
+        return {}
+    try:
+        data = json.loads(state_path.read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError) as exc:
+        logger.warning(f"Ignoring unreadable feed cache {state_path}: {exc}")
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def save_feed_state(path: str | Path, state: FeedState) -> None:
+    state_path = Path(path).expanduser()
+    state_path.parent.mkdir(parents=True, exist_ok=True)
+    state_path.write_text(json.dumps(state, indent=2, sort_keys=True), encoding="utf-8")
+
+
 def fetch_recent_posts(
     feed_url: str,
     window_hours: int = 24,
     limit: Optional[int] = None,
+    state: Optional[FeedState] = None,
+    stop_at_cutoff: bool = False,
 ) -> List[FeedPost]:
+    import feedparser
+
     logger.debug(f"Loading feed from {feed_url}")
-    feed = feedparser.parse(feed_url)
+    validators = (state or {}).get(feed_url) or {}
+    headers = {}
+    if validators.get("etag"):
+        headers["If-None-Match"] = validators["etag"]
+    if validators.get("last_modified"):
+        headers["If-Modified-Since"] = validators["last_modified"]
+    response = _get_session().get(feed_url, headers=headers, timeout=REQUEST_TIMEOUT)
+    fetched_at = datetime.now(timezone.utc)
+    if response.status_code == 304:
+        logger.debug(f"Feed {feed_url} unchanged since the last poll; skipping")
+        if state is not None:
+            state[feed_url] = {**validators, "last_fetched": fetched_at.isoformat()}
+        return []
+    response.raise_for_status()
+
+    response_headers = {key.lower(): value for key, value in response.headers.items()}
+    # Let feedparser resolve relative links against the final URL after redirects.
+    response_headers.setdefault("content-location", response.url)
+    feed = feedparser.parse(response.content, response_headers=response_headers)
     if feed.bozo:
         if getattr(feed, "entries", None):
             logger.warning(
@@ -101,7 +249,18 @@ def fetch_recent_posts(
         else:
             raise RuntimeError(f"Failed to parse feed {feed_url}: {feed.bozo_exception}")
 
-    cutoff = datetime.now(timezone.utc) - timedelta(hours=window_hours)
+    if state is not None:
+        fresh = {
+            key: response.headers[header]
+            for key, header in (("etag", "ETag"), ("last_modified", "Last-Modified"))
+            if response.headers.get(header)
+        }
+        if fresh:
+            state[feed_url] = {**fresh, "last_fetched": fetched_at.isoformat()}
+        else:
+            state.pop(feed_url, None)
+
+    cutoff = fetched_at - timedelta(hours=window_hours)
     posts: List[FeedPost] = []
     feed_title = feed.feed.get("title") or feed.feed.get("link") or feed_url
     for entry in feed.entries:
@@ -110,6 +269,9 @@ def fetch_recent_posts(
             logger.debug("Skipping entry without timestamp from {}", feed_url)
             continue
         if published < cutoff:
+            if stop_at_cutoff:
+                # Caller promised newest-first entries, so everything after this is older.
+                break
             continue
 
         link = getattr(entry, "link", feed.feed.get("link"))
@@ -117,8 +279,12 @@ def fetch_recent_posts(
             continue
 
         raw_html = _extract_entry_html(entry)
-        soup = BeautifulSoup(raw_html or "", "html.parser")
-        text = soup.get_text("\n").strip()
+        if _entry_content_type(entry) == "text/plain":
+            # Already plain text: no DOM to build, but it must be escaped before rendering.
+            text = raw_html.strip()
+            raw_html = f"<p>{html_escape(text)}</p>" if text else ""
+        else:
+            text = _html_to_text(raw_html)
         title = (getattr(entry, "title", "") or text or "New post").strip()
 
         source = feed_title
@@ -150,3 +316,35 @@ def fetch_recent_posts(
     if limit is not None and limit > 0:
         posts = posts[-limit:]
     return posts
+
+
+def fetch_many(
+    feed_urls: Sequence[str],
+    window_hours: int = 24,
+    limit: Optional[int] = None,
+    state: Optional[FeedState] = None,
+    max_workers: Optional[int] = None,
+    stop_at_cutoff: bool = False,
+) -> Tuple[List[FeedPost], List[Tuple[str, Exception]]]:
+    if not feed_urls:
+        return [], []
+
+    posts: List[FeedPost] = []
+    failures: List[Tuple[str, Exception]] = []
+    with ThreadPoolExecutor(max_workers=max_workers or min(16, len(feed_urls))) as executor:
+        futures = {
+            executor.submit(
+                fetch_recent_posts, feed_url, window_hours, limit, state, stop_at_cutoff
+            ): feed_url
+            for feed_url in feed_urls
+        }
+        for future in as_completed(futures):
+            try:
+                posts.extend(future.result())
+            except Exception as exc:
+                failures.append((futures[future], exc))
+
+    # Report failures in catalog order regardless of which feed finished first.
+    position = {feed_url: index for index, feed_url in enumerate(feed_urls)}
+    failures.sort(key=lambda failure: position[failure[0]])
+    return posts, failures
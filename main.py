@@ -1,6 +1,8 @@
 import argparse
 import datetime as dt
+import heapq
 import json
+import mmap
 import os
 import sys
 from dataclasses import dataclass
@@ -12,11 +14,28 @@ from dotenv import load_dotenv
 from loguru import logger
 
 from construct_email import render_email, send_email
-from feeds import FeedPost, fetch_recent_posts
+from feeds import (
+    DEFAULT_FEED_CACHE,
+    DEFAULT_TEXT_CACHE,
+    FeedPost,
+    fetch_many,
+    load_feed_state,
+    open_text_cache,
+    save_feed_state,
+)
 from translation import AzureTranslator
 
+try:
+    from orjson import loads as json_loads
+except ImportError:  # pragma: no cover - orjson is an optional speedup
+    json_loads = None
+
 load_dotenv(override=True)
 os.environ["TOKENIZERS_PARALLELISM"] = "false"
+# Snapshot once after .env is applied; add_argument looks up ~20 option defaults here.
+_ENV_SNAPSHOT = dict(os.environ)
+# First Azure OpenAI API version with Batch jobs and purpose="batch" file uploads.
+MIN_BATCH_API_VERSION = "2024-07-01-preview"
 
 parser = argparse.ArgumentParser(
     description="Send translated blog updates via email"
@@ -27,7 +46,7 @@ def add_argument(*args, **kwargs):
     parser.add_argument(*args, **kwargs)
     dest = kwargs.get("dest") or args[-1].lstrip("-").replace("-", "_")
     env_name = dest.upper()
-    env_value = os.getenv(env_name)
+    env_value = _ENV_SNAPSHOT.get(env_name)
     if env_value in (None, ""):
         return
     arg_type = kwargs.get("type")
@@ -41,7 +60,7 @@ def add_argument(*args, **kwargs):
     parser.set_defaults(**{dest: env_value})
 
 
-@dataclass
+@dataclass(slots=True)
 class FeedConfig:
     url: str
     name: Optional[str] = None
@@ -53,6 +72,18 @@ class FeedConfig:
     tags: Optional[list[str]] = None
 
 
+def _read_json(path: Path):
+    with path.open("rb") as fh:
+        if path.stat().st_size == 0:
+            # mmap refuses empty files; let the parser report the error as usual.
+            return (json_loads or json.loads)(b"")
+        # Parse straight from the page cache; orjson accepts the buffer without a copy.
+        with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as view:
+            if json_loads is not None:
+                return json_loads(view)
+            return json.loads(bytes(view))
+
+
 def load_feed_configs_from_file(path: str) -> list[FeedConfig]:
     feed_path = Path(path).expanduser()
     if not feed_path.is_absolute():
@@ -61,7 +92,8 @@ def load_feed_configs_from_file(path: str) -> list[FeedConfig]:
         raise FileNotFoundError(f"Feed list {feed_path} does not exist")
 
     try:
-        data = json.loads(feed_path.read_text())
+        # orjson.JSONDecodeError subclasses json.JSONDecodeError, so one except covers both.
+        data = _read_json(feed_path)
     except json.JSONDecodeError as exc:
         raise ValueError(f"Unable to parse feed list {feed_path}: {exc}") from exc
 
@@ -171,6 +203,23 @@ if __name__ == "__main__":
         default="2024-02-01",
         help="Azure OpenAI API version.",
     )
+    add_argument(
+        "--translation_concurrency",
+        type=int,
+        default=8,
+        help="Maximum number of translation requests in flight at once.",
+    )
+    add_argument(
+        "--offline_translation",
+        action=argparse.BooleanOptionalAction,
+        default=False,
+        help=(
+            "Translate through the Azure OpenAI Batch API (about half the cost). The run blocks "
+            "until the batch finishes, which can take up to 24h, so it does not fit the 6h "
+            "GitHub Actions job limit. Needs a batch-enabled deployment and "
+            f"AZURE_OPENAI_API_VERSION >= {MIN_BATCH_API_VERSION}."
+        ),
+    )
     add_argument("--smtp_server", type=str, help="SMTP server hostname.")
     add_argument(
         "--smtp_port",
@@ -180,7 +229,11 @@ if __name__ == "__main__":
     )
     add_argument("--sender", type=str, help="SMTP sender address.")
     add_argument("--sender_password", type=str, help="SMTP app password.")
-    add_argument("--receiver", type=str, help="Recipient email address.")
+    add_argument(
+        "--receiver",
+        type=str,
+        help="Recipient email address; separate multiple recipients with commas.",
+    )
     add_argument(
         "--email_subject_prefix",
         type=str,
@@ -193,12 +246,35 @@ if __name__ == "__main__":
         default="",
         help="Optional path to write feed fetch failures (useful for test runs).",
     )
+    add_argument(
+        "--feed_cache",
+        type=str,
+        nargs="?",
+        const=DEFAULT_FEED_CACHE,
+        default="",
+        help=(
+            "Optional path to a JSON file storing ETag/Last-Modified values so unchanged feeds "
+            f"are skipped; pass the flag without a value to use {DEFAULT_FEED_CACHE}."
+        ),
+    )
+    add_argument(
+        "--text_cache",
+        type=str,
+        nargs="?",
+        const=DEFAULT_TEXT_CACHE,
+        default="",
+        help=(
+            "Optional path to an on-disk cache of extracted post text so re-served entries skip "
+            f"HTML parsing; pass the flag without a value to use {DEFAULT_TEXT_CACHE}."
+        ),
+    )
     parser.add_argument("--debug", action="store_true", help="Enable verbose logging.")
     args = parser.parse_args()
 
     logger.remove()
     logger.add(sys.stdout, level="DEBUG" if args.debug else "INFO")
 
+    receivers = [addr.strip() for addr in (args.receiver or "").split(",") if addr.strip()]
     required_fields = {
         "azure_openai_key": args.azure_openai_key,
         "azure_openai_endpoint": args.azure_openai_endpoint,
@@ -207,7 +283,7 @@ if __name__ == "__main__":
         "smtp_port": args.smtp_port,
         "sender": args.sender,
         "sender_password": args.sender_password,
-        "receiver": args.receiver,
+        "receiver": receivers,
     }
     missing = [name for name, value in required_fields.items() if not value]
     if missing:
@@ -215,6 +291,12 @@ if __name__ == "__main__":
             f"Missing required configuration: {', '.join(missing)}. "
             "Use CLI flags or environment variables."
         )
+    if args.offline_translation and args.azure_openai_api_version < MIN_BATCH_API_VERSION:
+        # API versions are ISO dates, so they compare correctly as strings.
+        raise ValueError(
+            f"--offline_translation needs AZURE_OPENAI_API_VERSION >= {MIN_BATCH_API_VERSION} "
+            f"(got {args.azure_openai_api_version}); older versions lack the Batch/files API."
+        )
 
     limit = None if args.max_post_num == -1 else args.max_post_num
     feed_configs: list[FeedConfig] = []
@@ -247,21 +329,30 @@ if __name__ == "__main__":
     metadata_by_url = {cfg.url: cfg for cfg in feed_configs}
 
     logger.info(f"Fetching posts from {len(feed_configs)} feed(s)...")
-    posts_by_id: dict[str, FeedPost] = {}
+    posts_by_id: dict[tuple[str, str], FeedPost] = {}
     failed_feeds: list[tuple[str, str]] = []
     failure_log_path = Path(args.failure_log).expanduser() if args.failure_log else None
     per_feed_limit = None if args.max_posts_per_feed <= 0 else args.max_posts_per_feed
-    for cfg in feed_configs:
-        url = cfg.url
-        try:
-            for post in fetch_recent_posts(url, args.window_hours, per_feed_limit):
-                key = f"{post.source}:{post.id}"
-                posts_by_id[key] = post
-        except Exception as exc:
-            failure_reason = f"{type(exc).__name__}: {exc}"
-            failure_reason = " ".join(failure_reason.split())
-            logger.warning(f"Skipping feed {url}: {failure_reason}")
-            failed_feeds.append((url, failure_reason))
+    feed_state = load_feed_state(args.feed_cache) if args.feed_cache else None
+
+    def persist_feed_state():
+        if feed_state is not None:
+            save_feed_state(args.feed_cache, feed_state)
+            logger.debug(f"Feed cache written to {args.feed_cache}")
+
+    if args.text_cache:
+        open_text_cache(args.text_cache)
+
+    fetched_posts, fetch_errors = fetch_many(
+        [cfg.url for cfg in feed_configs], args.window_hours, per_feed_limit, feed_state
+    )
+    for post in fetched_posts:
+        posts_by_id[(post.source, post.id)] = post
+    for url, exc in fetch_errors:
+        failure_reason = f"{type(exc).__name__}: {exc}"
+        failure_reason = " ".join(failure_reason.split())
+        logger.warning(f"Skipping feed {url}: {failure_reason}")
+        failed_feeds.append((url, failure_reason))
 
     if failed_feeds:
         logger.warning(f"Skipped {len(failed_feeds)} feed(s) due to errors:")
@@ -281,7 +372,16 @@ if __name__ == "__main__":
         parsed = urlparse(url)
         return parsed.netloc or None
 
-    posts = sorted(posts_by_id.values(), key=lambda p: p.published)
+    if limit is not None and limit > 0:
+        # O(n log k) selection of the newest posts instead of sorting the whole pool.
+        # The insertion index breaks ties like sorted()[-limit:]: later posts win and
+        # tied posts keep their order.
+        newest = heapq.nlargest(
+            limit, enumerate(posts_by_id.values()), key=lambda item: (item[1].published, item[0])
+        )
+        posts = [post for _, post in reversed(newest)]
+    else:
+        posts = sorted(posts_by_id.values(), key=lambda p: p.published)
     for post in posts:
         meta = metadata_by_url.get(post.feed_url)
         site_hint = _derive_site_from_url(meta.site if meta else None) or _derive_site_from_url(
@@ -297,11 +397,10 @@ if __name__ == "__main__":
         post.source_description = meta.description if meta else None
         post.source_tags = meta.tags if meta and meta.tags else None
         post.source_accent = meta.accent_color if meta else None
-    if limit is not None and limit > 0:
-        posts = posts[-limit:]
     if not posts:
         logger.info("No new posts found in the requested window.")
         if not args.send_empty:
+            persist_feed_state()
             sys.exit(0)
 
     if posts:
@@ -311,8 +410,13 @@ if __name__ == "__main__":
             deployment=args.azure_openai_deployment,
             api_version=args.azure_openai_api_version,
             target_language=args.target_language,
+            concurrency=args.translation_concurrency,
         )
-        translations = translator.translate_batch([p.content_text for p in posts])
+        texts = [p.content_text for p in posts]
+        if args.offline_translation:
+            translations = translator.translate_batch_offline(texts)
+        else:
+            translations = translator.translate_batch(texts)
         for post, translation in zip(posts, translations, strict=False):
             post.translation = translation
 
@@ -321,11 +425,12 @@ if __name__ == "__main__":
     logger.info("Sending email...")
     send_email(
         sender=args.sender,
-        receiver=args.receiver,
+        receivers=receivers,
         password=args.sender_password,
         smtp_server=args.smtp_server,
         smtp_port=args.smtp_port,
         html=html,
         subject=subject,
     )
+    persist_feed_state()
     logger.success("Digest sent successfully.")
@@ -0,0 +1,73 @@
+import json
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional, Sequence
+
+import numpy as np
+from loguru import logger
+
+
+class OnnxEmbedder:
+    """Sentence embedder backed by an exported ONNX model and a fast HF tokenizer.
+
+    ``model_dir`` is the directory the model was exported to; it must contain
+    ``model.onnx`` and ``tokenizer.json``. The pooling mode is read from the
+    sentence-transformers ``1_Pooling/config.json`` when present (mean otherwise).
+    """
+
+    def __init__(self, model_dir: Path, max_length: int = 512):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        self.tokenizer = Tokenizer.from_file(str(model_dir / "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=max_length)
+        self.tokenizer.enable_padding()
+        available = set(ort.get_available_providers())
+        providers = [
+            provider
+            for provider in ("CUDAExecutionProvider", "CPUExecutionProvider")
+            if provider in available
+        ]
+        self.session = ort.InferenceSession(str(model_dir / "model.onnx"), providers=providers)
+        self.input_names = {node.name for node in self.session.get_inputs()}
+        self.pooling = "mean"
+        pooling_config = model_dir / "1_Pooling" / "config.json"
+        if pooling_config.exists():
+            config = json.loads(pooling_config.read_text(encoding="utf-8"))
+            if config.get("pooling_mode_cls_token"):
+                self.pooling = "cls"
+
+    def encode(self, texts: Sequence[str], batch_size: int = 64) -> np.ndarray:
+        batches = []
+        for start in range(0, len(texts), batch_size):
+            encodings = self.tokenizer.encode_batch(list(texts[start : start + batch_size]))
+            input_ids = np.array([encoding.ids for encoding in encodings], dtype=np.int64)
+            attention_mask = np.array(
+                [encoding.attention_mask for encoding in encodings], dtype=np.int64
+            )
+            feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+            if "token_type_ids" in self.input_names:
+                feeds["token_type_ids"] = np.zeros_like(input_ids)
+            hidden = self.session.run(None, feeds)[0].astype(np.float32, copy=False)
+
+            if self.pooling == "cls":
+                pooled = hidden[:, 0]
+            else:
+                mask = attention_mask[..., None].astype(np.float32)
+                pooled = (hidden * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+            norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+            batches.append(pooled / np.maximum(norms, 1e-12))
+        return np.concatenate(batches) if batches else np.empty((0, 0), dtype=np.float32)
+
+
+@lru_cache(maxsize=4)
+def load_onnx_embedder(model_dir: str) -> Optional[OnnxEmbedder]:
+    path = Path(model_dir).expanduser()
+    if not (path / "model.onnx").exists() or not (path / "tokenizer.json").exists():
+        logger.debug(f"No ONNX export found in {path}")
+        return None
+    try:
+        return OnnxEmbedder(path)
+    except ImportError as exc:
+        logger.warning(f"ONNX embedder unavailable ({exc}); falling back to sentence-transformers")
+        return None
@@ -2,9 +2,16 @@ from __future__ import annotations
 
 import time
 import unittest
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from unittest import mock
 
-from feeds import _extract_entry_datetime, _extract_entry_html
+from feeds import (
+    _entry_content_type,
+    _extract_entry_datetime,
+    _extract_entry_html,
+    fetch_recent_posts,
+)
 
 
 class ExtractEntryHtmlTest(unittest.TestCase):
@@ -37,6 +44,22 @@ class ExtractEntryHtmlTest(unittest.TestCase):
         self.assertEqual(_extract_entry_html({}), "")
 
 
+class EntryContentTypeTest(unittest.TestCase):
+    def test_reads_type_from_content_payload(self) -> None:
+        entry = {
+            "content": [{"value": "plain", "type": "text/plain"}],
+            "summary_detail": {"value": "<p>html</p>", "type": "text/html"},
+        }
+        self.assertEqual(_entry_content_type(entry), "text/plain")
+
+    def test_falls_back_to_summary_detail_type(self) -> None:
+        entry = {"summary_detail": {"value": "<p>html</p>", "type": "text/html"}}
+        self.assertEqual(_entry_content_type(entry), "text/html")
+
+    def test_returns_empty_string_when_type_unknown(self) -> None:
+        self.assertEqual(_entry_content_type({"summary": "text"}), "")
+
+
 class ExtractEntryDatetimeTest(unittest.TestCase):
     def test_prefers_published_timestamp(self) -> None:
         published = time.gmtime(1_700_000_000)
@@ -57,6 +80,54 @@ class ExtractEntryDatetimeTest(unittest.TestCase):
     def test_returns_none_when_no_timestamp_fields(self) -> None:
         self.assertIsNone(_extract_entry_datetime({}))
 
+    def test_clamps_leap_second(self) -> None:
+        entry = {"published_parsed": time.struct_time((2016, 12, 31, 23, 59, 60, 5, 366, 0))}
+        expected = datetime(2016, 12, 31, 23, 59, 59, tzinfo=timezone.utc)
+        self.assertEqual(_extract_entry_datetime(entry), expected)
+
+    def test_skips_out_of_range_timestamp(self) -> None:
+        invalid = time.struct_time((2024, 2, 30, 0, 0, 0, 0, 1, 0))
+        updated = time.gmtime(1_600_000_000)
+        entry = {"published_parsed": invalid, "updated_parsed": updated}
+        expected = datetime.fromtimestamp(1_600_000_000, tz=timezone.utc)
+        self.assertEqual(_extract_entry_datetime(entry), expected)
+
+
+class FetchRecentPostsTest(unittest.TestCase):
+    @staticmethod
+    def _rss(*offsets_hours: int) -> bytes:
+        now = datetime.now(timezone.utc)
+        items = "".join(
+            f"<item><title>post {index}</title><link>https://example.com/{index}</link>"
+            f"<guid>{index}</guid><pubDate>"
+            f"{format_datetime(now - timedelta(hours=hours))}</pubDate></item>"
+            for index, hours in enumerate(offsets_hours)
+        )
+        return (
+            '<?xml version="1.0"?><rss version="2.0"><channel><title>Example</title>'
+            f"<link>https://example.com/</link>{items}</channel></rss>"
+        ).encode("utf-8")
+
+    def _fetch(self, content: bytes, **kwargs) -> list[str]:
+        response = mock.Mock(
+            status_code=200,
+            content=content,
+            headers={"Content-Type": "application/rss+xml"},
+            url="https://example.com/feed",
+        )
+        session = mock.Mock()
+        session.get.return_value = response
+        with mock.patch("feeds._get_session", return_value=session):
+            posts = fetch_recent_posts("https://example.com/feed", window_hours=24, **kwargs)
+        return [post.title for post in posts]
+
+    def test_keeps_in_window_entry_after_stale_one(self) -> None:
+        # Unsorted feed: new, stale, new again.
+        self.assertEqual(self._fetch(self._rss(1, 48, 2)), ["post 2", "post 0"])
+
+    def test_stop_at_cutoff_is_opt_in(self) -> None:
+        self.assertEqual(self._fetch(self._rss(1, 48, 2), stop_at_cutoff=True), ["post 0"])
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,209 @@
+from __future__ import annotations
+
+import asyncio
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from translation import AzureTranslator
+
+
+def _translator(max_chars: int) -> AzureTranslator:
+    return AzureTranslator(
+        api_key="test",
+        endpoint="https://example.openai.azure.com",
+        deployment="test",
+        api_version="2024-02-01",
+        target_language="zh-TW",
+        max_chars=max_chars,
+    )
+
+
+class _StubCompletions:
+    """Answers each request with ``reply(user_prompt)``; ``None`` means content-filtered."""
+
+    def __init__(self, reply) -> None:
+        self.reply = reply
+        self.prompts: list[str] = []
+
+    async def create(self, **kwargs):
+        prompt = kwargs["messages"][-1]["content"]
+        self.prompts.append(prompt)
+        content = self.reply(prompt)
+        choice = SimpleNamespace(
+            message=SimpleNamespace(content=content),
+            finish_reason="content_filter" if content is None else "stop",
+        )
+        return SimpleNamespace(choices=[choice])
+
+
+def _run(translator: AzureTranslator, reply, method, *args):
+    completions = _StubCompletions(reply)
+    translator.aclient = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    try:
+        result = asyncio.run(method(*args, asyncio.Semaphore(4)))
+    finally:
+        translator.aclient = None
+    return result, completions.prompts
+
+
+class GroupTranslationTest(unittest.TestCase):
+    def test_parses_sections_in_order(self) -> None:
+        translator = _translator(1000)
+        reply = "⟦1⟧\nBETA\n⟦/1⟧\n⟦0⟧\n ALPHA \n⟦/0⟧"
+        result, prompts = _run(
+            translator, lambda _: reply, translator._atranslate_chunk_group, ["alpha", "beta"]
+        )
+        self.assertEqual(result, ["ALPHA", "BETA"])
+        self.assertEqual(prompts, ["⟦0⟧\nalpha\n⟦/0⟧\n⟦1⟧\nbeta\n⟦/1⟧"])
+        self.assertEqual(translator._cache_get("beta"), "BETA")
+
+    def test_malformed_replies_return_none(self) -> None:
+        replies = {
+            "missing section": "⟦0⟧\nALPHA\n⟦/0⟧",
+            "empty section": "⟦0⟧\nALPHA\n⟦/0⟧\n⟦1⟧\n \n⟦/1⟧",
+            "extra section": "⟦0⟧\nA\n⟦/0⟧\n⟦1⟧\nB\n⟦/1⟧\n⟦2⟧\nC\n⟦/2⟧",
+            "no sections": "ALPHA BETA",
+        }
+        for name, reply in replies.items():
+            with self.subTest(name):
+                translator = _translator(1000)
+                result, _ = _run(
+                    translator,
+                    lambda _: reply,
+                    translator._atranslate_chunk_group,
+                    ["alpha", "beta"],
+                )
+                self.assertIsNone(result)
+                self.assertIsNone(translator._cache_get("alpha"))
+
+    def test_filtered_group_falls_back_per_chunk(self) -> None:
+        translator = _translator(1000)
+
+        def reply(prompt: str):
+            return None if "⟦0⟧" in prompt else prompt.upper()
+
+        result, prompts = _run(
+            translator, reply, translator._atranslate_group, ["alpha", "beta", "alpha"]
+        )
+        self.assertEqual(result, ["ALPHA", "BETA", "ALPHA"])
+        self.assertEqual(prompts[1:], ["alpha", "beta"])
+
+
+class ContentFilterRetryTest(unittest.TestCase):
+    _PARAGRAPHS = [letter * 120 for letter in "abcd"]
+
+    def test_leaves_keep_text_order_across_depths(self) -> None:
+        translator = _translator(1000)
+        chunk = "\n\n".join(self._PARAGRAPHS)
+        first_half = "\n\n".join(self._PARAGRAPHS[:2])
+        blocked = {chunk, first_half, self._PARAGRAPHS[1]}
+
+        def reply(prompt: str):
+            return None if prompt in blocked else prompt.upper()
+
+        result, prompts = _run(translator, reply, translator._atranslate_chunk, chunk)
+        # The second half resolves a level before the first half's pieces do.
+        self.assertEqual(prompts.index("\n\n".join(self._PARAGRAPHS[2:])), 2)
+        self.assertEqual(
+            result.split("\n\n"),
+            [
+                "A" * 120,
+                "[Translation skipped: blocked by Azure content filter]",
+                "C" * 120,
+                "D" * 120,
+            ],
+        )
+
+    def test_split_without_progress_is_not_retried(self) -> None:
+        chunk = "\n\n".join(self._PARAGRAPHS)
+        splits = {
+            "no shorter half": [(chunk, None), ("tail", None)],
+            "single half": [(chunk[:-1], None)],
+        }
+        for name, halves in splits.items():
+            with self.subTest(name):
+                translator = _translator(1000)
+                with mock.patch.object(translator, "_split_for_filter", return_value=halves):
+                    result, prompts = _run(
+                        translator, lambda _: None, translator._atranslate_chunk, chunk
+                    )
+                self.assertEqual(prompts, [chunk])
+                self.assertEqual(
+                    result, "[Translation skipped: blocked by Azure content filter]"
+                )
+
+
+class ChunkTextTest(unittest.TestCase):
+    def test_short_text_is_single_chunk(self) -> None:
+        text = "  short\n\ntext  "
+        self.assertEqual(_translator(100)._chunk_text(text), [text])
+
+    def test_packs_paragraphs_up_to_limit(self) -> None:
+        text = "\n\n".join(["a" * 10, "b" * 10, "c" * 10, "d" * 10])
+        self.assertEqual(
+            _translator(25)._chunk_text(text),
+            ["a" * 10 + "\n\n" + "b" * 10, "c" * 10 + "\n\n" + "d" * 10],
+        )
+
+    def test_skips_blank_paragraphs_and_trims(self) -> None:
+        text = "  first line\nsecond line \n\n \n\n\n\nlast  " + "x" * 20
+        self.assertEqual(
+            _translator(30)._chunk_text(text),
+            ["first line\nsecond line", "last  " + "x" * 20],
+        )
+
+    def test_balances_chunks_instead_of_leaving_a_short_tail(self) -> None:
+        # Greedy fills the first chunk (a+b, 20 chars) and leaves an 8-char tail; both need two.
+        text = "\n\n".join(["a" * 9, "b" * 9, "c" * 3, "d" * 3])
+        self.assertEqual(
+            _translator(20)._chunk_text(text),
+            ["a" * 9, "b" * 9 + "\n\nccc\n\nddd"],
+        )
+
+    def test_oversized_paragraph_is_split(self) -> None:
+        long_paragraph = " ".join(["word"] * 30)
+        chunks = _translator(50)._chunk_text("intro\n\n" + long_paragraph + "\n\noutro")
+        self.assertEqual(chunks[0], "intro")
+        self.assertEqual(chunks[-1], "outro")
+        self.assertTrue(all(len(chunk) <= 50 for chunk in chunks))
+        self.assertEqual(" ".join(chunks[1:-1]).split(), long_paragraph.split())
+
+
+class SplitLongTextTest(unittest.TestCase):
+    def test_breaks_between_sentences(self) -> None:
+        text = "First sentence is here. Second one follows! Third? 第一句。第二句！"
+        self.assertEqual(
+            _translator(30)._split_long_text(text),
+            ["First sentence is here.", "Second one follows! Third?", "第一句。第二句！"],
+        )
+
+    def test_falls_back_to_spaces_for_long_sentences(self) -> None:
+        text = " ".join(["word"] * 30) + ". Short."
+        pieces = _translator(50)._split_long_text(text)
+        self.assertTrue(all(len(piece) <= 50 for piece in pieces))
+        self.assertEqual(pieces[-1], "Short.")
+        self.assertEqual(" ".join(pieces).split(), text.split())
+
+
+class SplitForFilterTest(unittest.TestCase):
+    def test_halves_paragraphs_and_rebases_spans(self) -> None:
+        text = "one\n\ntwo\n\nthree\n\nfour"
+        halves = _translator(100)._split_for_filter(text)
+        self.assertEqual(
+            halves,
+            [("one\n\ntwo", [(0, 3), (5, 8)]), ("three\n\nfour", [(0, 5), (7, 11)])],
+        )
+        second, spans = halves[1]
+        self.assertEqual(
+            _translator(100)._split_for_filter(second, spans),
+            [("three", [(0, 5)]), ("four", [(0, 4)])],
+        )
+
+    def test_single_paragraph_splits_near_middle_space(self) -> None:
+        halves = _translator(100)._split_for_filter("alpha beta gamma delta")
+        self.assertEqual([part for part, _ in halves], ["alpha beta", "gamma delta"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,9 +1,46 @@
 from __future__ import annotations
 
-from typing import List, Sequence
+import asyncio
+import contextlib
+import hashlib
+import json
+import re
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
 
 from loguru import logger
-from openai import AzureOpenAI, BadRequestError
+from openai import AsyncAzureOpenAI, AzureOpenAI, BadRequestError
+
+try:
+    from orjson import loads as json_loads
+except ImportError:  # pragma: no cover - orjson is an optional speedup
+    json_loads = json.loads
+
+
+_GROUP_PROMPT = (
+    "輸入包含多個以 ⟦i⟧ 與 ⟦/i⟧ 標記的段落，請分別處理每個段落，"
+    "輸出時保留完全相同的分隔標記，並依原順序回傳所有段落。"
+)
+_GROUP_SECTION = re.compile(r"⟦(\d+)⟧(.*?)⟦/\1⟧", re.S)
+_MAX_GROUP_SIZE = 8
+_SUMMARY_TOKENS = 400
+_FILTER_CODES = frozenset({"content_filter", "responsibleaipolicyviolation"})
+# One match per paragraph (runs separated by a blank line), already trimmed of whitespace.
+_PARAGRAPH = re.compile(r"\S.*?(?=\s*(?:\n\n|\Z))", re.S)
+
+
+@lru_cache(maxsize=1)
+def _token_encoding() -> Any:
+    # Loaded on first use: tiktoken downloads its BPE tables, which can fail offline.
+    try:
+        import tiktoken
+
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception as exc:
+        logger.warning(f"tiktoken unavailable ({exc}); estimating tokens from length")
+        return None
 
 
 class ContentFilterTriggeredError(Exception):
@@ -11,6 +48,8 @@ class ContentFilterTriggeredError(Exception):
 
 
 class AzureTranslator:
+    _SENT = re.compile(r"(?<=[.!?。！？])\s+|\n")
+
     def __init__(
         self,
         *,
@@ -21,144 +60,415 @@ class AzureTranslator:
         target_language: str,
         max_chars: int = 4000,
         temperature: float | None = None,
+        concurrency: int = 8,
     ):
         self.client = AzureOpenAI(
             api_key=api_key,
             api_version=api_version,
             azure_endpoint=endpoint,
         )
+        self._client_kwargs = {
+            "api_key": api_key,
+            "api_version": api_version,
+            "azure_endpoint": endpoint,
+        }
+        # Bound per event loop by _async_client(); httpx pools cannot outlive their loop.
+        self.aclient: Optional[AsyncAzureOpenAI] = None
         self.deployment = deployment
         self.target_language = target_language
         self.max_chars = max_chars
         self.temperature = temperature
+        self.concurrency = max(concurrency, 1)
         self._max_filter_depth = 3
+        self._cache: OrderedDict[bytes, str] = OrderedDict()
+        self._cache_max = 4096
+        self._system_prompt = (
+            "請將下列技術文章摘要成不超過 200 個中文字，保留核心概念、關鍵步驟與主要結論，"
+            "避免加入主觀評論，只呈現最重要的資訊。保持原有的數學符號、LaTeX、URL、Markdown 與程式碼區塊不變。"
+        )
+        self._group_system_prompt = self._system_prompt + _GROUP_PROMPT
+        self._base_kwargs: Dict[str, Any] = {"model": deployment}
+        if temperature is not None:
+            self._base_kwargs["temperature"] = temperature
 
     def translate_batch(self, texts: Sequence[str]) -> List[str]:
-        translations: List[str] = []
-        for text in texts:
+        return asyncio.run(self.atranslate_batch(texts))
+
+    async def atranslate_batch(self, texts: Sequence[str]) -> List[str]:
+        # Every chunk of every text is in flight at once, bounded by the semaphore.
+        sem = asyncio.Semaphore(self.concurrency)
+        flat = self._flatten(texts)
+        groups = self._group_chunks([chunk for _, _, chunk in flat])
+        async with self._async_client():
+            group_results = await asyncio.gather(
+                *(self._atranslate_group(group, sem) for group in groups),
+                return_exceptions=True,
+            )
+        outputs: List[str] = []
+        for group, outcome in zip(groups, group_results):
+            if isinstance(outcome, BaseException):
+                outputs.extend([f"[Translation error: {outcome}]"] * len(group))
+            else:
+                outputs.extend(outcome)
+        return self._regroup(len(texts), flat, outputs)
+
+    def translate_batch_offline(
+        self, texts: Sequence[str], *, poll_interval: float = 60.0
+    ) -> List[str]:
+        """Translate through the Batch API: slower turnaround, roughly half the cost."""
+        flat = self._flatten(texts)
+        if not flat:
+            return ["" for _ in texts]
+        lines = [
+            json.dumps(
+                {
+                    "custom_id": f"{text_idx}:{chunk_idx}",
+                    "method": "POST",
+                    "url": "/chat/completions",
+                    "body": self._chunk_request(chunk),
+                },
+                ensure_ascii=False,
+            )
+            for text_idx, chunk_idx, chunk in flat
+        ]
+
+        batch_file = self.client.files.create(
+            file=("translation-batch.jsonl", "\n".join(lines).encode("utf-8")),
+            purpose="batch",
+        )
+        batch = self.client.batches.create(
+            input_file_id=batch_file.id,
+            endpoint="/chat/completions",
+            completion_window="24h",
+        )
+        logger.info(f"Submitted translation batch {batch.id} with {len(lines)} chunk(s)")
+        while batch.status not in ("completed", "failed", "expired", "cancelled"):
+            time.sleep(poll_interval)
+            batch = self.client.batches.retrieve(batch.id)
+            logger.debug(f"Translation batch {batch.id} status: {batch.status}")
+        if batch.status != "completed":
+            logger.warning(
+                f"Translation batch {batch.id} ended with status {batch.status}; "
+                "translating all chunks online instead"
+            )
+            return self.translate_batch(texts)
+
+        results: Dict[str, str] = {}
+        if batch.output_file_id:
+            output = self.client.files.content(batch.output_file_id).text
+            for line in output.splitlines():
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                response = record.get("response") or {}
+                if response.get("status_code") != 200:
+                    continue
+                choices = (response.get("body") or {}).get("choices") or []
+                if not choices:
+                    continue  # left for the online retry below
+                choice = choices[0] or {}
+                content = ((choice.get("message") or {}).get("content") or "").strip()
+                if content and choice.get("finish_reason") != "content_filter":
+                    results[record["custom_id"]] = content
+        outputs = [results.get(f"{text_idx}:{chunk_idx}") for text_idx, chunk_idx, _ in flat]
+
+        # Anything the batch could not translate (errors, content filter) goes through the
+        # online path, which knows how to split filtered chunks.
+        retry = [index for index, output in enumerate(outputs) if output is None]
+        if retry:
+            logger.info(f"Retrying {len(retry)} chunk(s) from batch {batch.id} online")
+
+            async def translate_retries() -> List[str]:
+                sem = asyncio.Semaphore(self.concurrency)
+                async with self._async_client():
+                    return await asyncio.gather(
+                        *(self._atranslate_chunk(flat[index][2], sem) for index in retry)
+                    )
+
+            for index, translated in zip(retry, asyncio.run(translate_retries())):
+                outputs[index] = translated
+        return self._regroup(len(texts), flat, outputs)
+
+    def _make_async_client(self) -> AsyncAzureOpenAI:
+        return AsyncAzureOpenAI(**self._client_kwargs)
+
+    @contextlib.asynccontextmanager
+    async def _async_client(self) -> AsyncIterator[AsyncAzureOpenAI]:
+        # A fresh client per asyncio.run: reusing one across loops fails with
+        # "Event loop is closed" once its pooled connections are touched again.
+        aclient = self._make_async_client()
+        self.aclient = aclient
+        try:
+            yield aclient
+        finally:
+            self.aclient = None
+            await aclient.close()
+
+    def _flatten(self, texts: Sequence[str]) -> List[Tuple[int, int, str]]:
+        flat: List[Tuple[int, int, str]] = []
+        for text_idx, text in enumerate(texts):
             if not text:
-                translations.append("")
                 continue
-
             chunks = self._chunk_text(text)
             logger.debug(
                 f"Translating text with {len(chunks)} chunk(s) (total chars: {len(text)})"
             )
-            translated_chunks: List[str] = []
-            for chunk in chunks:
-                translated_chunks.append(self._translate_chunk(chunk))
+            flat.extend((text_idx, chunk_idx, chunk) for chunk_idx, chunk in enumerate(chunks))
+        return flat
 
-            translation = "\n\n".join(part for part in translated_chunks if part).strip()
-            translations.append(translation)
-        return translations
+    @staticmethod
+    def _regroup(
+        count: int, flat: Sequence[Tuple[int, int, str]], outputs: Sequence[str]
+    ) -> List[str]:
+        # Chunk results are already stripped, so empty ones are dropped and the rest joined as-is.
+        buckets: List[List[str]] = [[] for _ in range(count)]
+        for (text_idx, _, _), output in zip(flat, outputs):
+            if output:
+                buckets[text_idx].append(output)
+        return ["\n\n".join(bucket) for bucket in buckets]
 
-    def _translate_chunk(self, chunk: str, *, _depth: int = 0) -> str:
-        prompt = (
-            "請將下列技術文章摘要成不超過 200 個中文字，保留核心概念、關鍵步驟與主要結論，"
-            "避免加入主觀評論，只呈現最重要的資訊。保持原有的數學符號、LaTeX、URL、Markdown 與程式碼區塊不變。"
+    def _chunk_request(self, chunk: str, *, sections: int = 1) -> Dict[str, Any]:
+        prompt = self._group_system_prompt if sections > 1 else self._system_prompt
+        return {
+            **self._base_kwargs,
+            "messages": [
+                {"role": "system", "content": prompt},
+                {"role": "user", "content": chunk},
+            ],
+            # Cap runaway generations we would discard, but always leave room for each
+            # section's 200-character summary (CJK text runs close to a token per character).
+            "max_tokens": min(
+                4096, max(_SUMMARY_TOKENS * sections, int(self._estimate_tokens(chunk) * 1.8) + 64)
+            ),
+        }
+
+    def _estimate_tokens(self, text: str) -> int:
+        encoding = _token_encoding()
+        if encoding is not None:
+            return len(encoding.encode(text, disallowed_special=()))
+        return len(text) // 3
+
+    def _response_content(self, choice: Any) -> str:
+        content = (choice.message.content or "").strip()
+        if choice.finish_reason == "content_filter" or not content:
+            raise ContentFilterTriggeredError(
+                f"Azure returned finish_reason={choice.finish_reason!r}"
+            )
+        return content
+
+    def _group_chunks(self, chunks: Sequence[str]) -> List[List[str]]:
+        # Pack consecutive small chunks into one request; RPM, not TPM, is the usual ceiling.
+        budget = int(self.max_chars * 0.9)
+        groups: List[List[str]] = []
+        current: List[str] = []
+        current_len = 0
+        for chunk in chunks:
+            if current and (
+                current_len + len(chunk) + 10 > budget or len(current) >= _MAX_GROUP_SIZE
+            ):
+                groups.append(current)
+                current, current_len = [], 0
+            current.append(chunk)
+            current_len += len(chunk) + 10  # "⟦i⟧\n", "\n⟦/i⟧" and the joining newline
+        if current:
+            groups.append(current)
+        return groups
+
+    def _cache_key(self, chunk: str) -> bytes:
+        return hashlib.blake2b(
+            f"{self.target_language}|{self.deployment}|{chunk}".encode("utf-8"), digest_size=16
+        ).digest()
+
+    def _cache_get(self, chunk: str) -> Optional[str]:
+        key = self._cache_key(chunk)
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+        return cached
+
+    def _cache_put(self, chunk: str, translation: str) -> None:
+        self._cache[self._cache_key(chunk)] = translation
+        if len(self._cache) > self._cache_max:
+            self._cache.popitem(last=False)
+
+    async def _atranslate_group(self, group: List[str], sem: asyncio.Semaphore) -> List[str]:
+        # Feeds repeat boilerplate (headers, disclaimers); only send chunks not seen before.
+        results = [self._cache_get(chunk) for chunk in group]
+        pending = list(
+            dict.fromkeys(chunk for chunk, cached in zip(group, results) if cached is None)
         )
+        translated: Optional[List[str]] = None
+        if len(pending) > 1:
+            translated = await self._atranslate_chunk_group(pending, sem)
+        if translated is None:
+            translated = list(
+                await asyncio.gather(*(self._atranslate_chunk(chunk, sem) for chunk in pending))
+            )
+        fresh = dict(zip(pending, translated))
+        return [
+            cached if cached is not None else fresh[chunk] for chunk, cached in zip(group, results)
+        ]
+
+    async def _atranslate_chunk_group(
+        self, chunks: List[str], sem: asyncio.Semaphore
+    ) -> Optional[List[str]]:
+        payload = "\n".join(f"⟦{i}⟧\n{chunk}\n⟦/{i}⟧" for i, chunk in enumerate(chunks))
+        try:
+            async with sem:
+                response = await self.aclient.chat.completions.create(
+                    **self._chunk_request(payload, sections=len(chunks))
+                )
+            content = self._response_content(response.choices[0])
+        except Exception as exc:
+            # Content filtering and other failures are handled chunk by chunk.
+            logger.debug(f"Grouped translation of {len(chunks)} chunk(s) failed: {exc}")
+            return None
+
+        sections = {int(index): body.strip() for index, body in _GROUP_SECTION.findall(content)}
+        translated = [sections.get(i, "") for i in range(len(chunks))]
+        if len(sections) != len(chunks) or not all(translated):
+            logger.debug(
+                f"Grouped translation returned {len(sections)}/{len(chunks)} section(s); "
+                "retrying chunk by chunk"
+            )
+            return None
+        for chunk, translation in zip(chunks, translated):
+            self._cache_put(chunk, translation)
+        return translated
+
+    async def _atranslate_chunk(self, chunk: str, sem: asyncio.Semaphore) -> str:
+        # Content-filtered parts are halved and retried level by level, up to
+        # _max_filter_depth; leaves are keyed by their split path to keep text order.
+        # Each part carries its paragraph spans so deeper splits never rescan the text.
+        pending: List[Tuple[Tuple[int, ...], str, Optional[List[Tuple[int, int]]]]] = [
+            ((), chunk, None)
+        ]
+        leaves: Dict[Tuple[int, ...], str] = {}
+        depth = 0
+        while pending:
+            outcomes = await asyncio.gather(
+                *(self._atranslate_chunk_once(part, sem) for _, part, _ in pending),
+                return_exceptions=True,
+            )
+            retry: List[Tuple[Tuple[int, ...], str, Optional[List[Tuple[int, int]]]]] = []
+            for (path, part, spans), outcome in zip(pending, outcomes):
+                if not isinstance(outcome, BaseException):
+                    leaves[path] = outcome
+                    continue
+                if not isinstance(outcome, ContentFilterTriggeredError):
+                    logger.opt(exception=outcome).error("Translation chunk failed")
+                    leaves[path] = f"[Translation error: {outcome}]"
+                    continue
+
+                halves: List[Tuple[str, List[Tuple[int, int]]]] = []
+                if depth < self._max_filter_depth and len(part) > 200:
+                    halves = self._split_for_filter(part, spans)
+                # Only retry when the split actually made progress.
+                can_retry = len(halves) > 1 and all(len(half) < len(part) for half, _ in halves)
+                log_fn = logger.info if can_retry else logger.warning
+                log_fn(
+                    "Content filter blocked translation (depth={}, chars={}): {}",
+                    depth,
+                    len(part),
+                    self._summarize_filter_reason(str(outcome)),
+                )
+                if can_retry:
+                    retry.extend(
+                        (path + (index,), half, half_spans)
+                        for index, (half, half_spans) in enumerate(halves)
+                    )
+                else:
+                    leaves[path] = "[Translation skipped: blocked by Azure content filter]"
+            pending = retry
+            depth += 1
+
+        combined = "\n\n".join(leaves[path] for path in sorted(leaves) if leaves[path])
+        return combined or "[Translation skipped: blocked by Azure content filter]"
+
+    async def _atranslate_chunk_once(self, chunk: str, sem: asyncio.Semaphore) -> str:
+        cached = self._cache_get(chunk)
+        if cached is not None:
+            return cached
         try:
-            kwargs = {
-                "model": self.deployment,
-                "messages": [
-                    {"role": "system", "content": prompt},
-                    {"role": "user", "content": chunk},
-                ],
-            }
-            if self.temperature is not None:
-                kwargs["temperature"] = self.temperature
-
-            response = self.client.chat.completions.create(**kwargs)
-            choice = response.choices[0]
-            content = (choice.message.content or "").strip()
-            if choice.finish_reason == "content_filter" or not content:
-                raise ContentFilterTriggeredError(
-                    f"Azure returned finish_reason={choice.finish_reason!r}"
+            # Hold the semaphore only for the request; filter retries queue for their own slot.
+            async with sem:
+                response = await self.aclient.chat.completions.create(
+                    **self._chunk_request(chunk)
                 )
-            return content
-        except ContentFilterTriggeredError as exc:
-            return self._handle_content_filter(chunk, _depth, str(exc))
+            content = self._response_content(response.choices[0])
         except BadRequestError as exc:
             if self._is_content_filter_error(exc):
-                return self._handle_content_filter(chunk, _depth, str(exc))
+                raise ContentFilterTriggeredError(str(exc)) from exc
             logger.exception("Translation chunk failed")
             return f"[Translation error: {exc}]"
+        except ContentFilterTriggeredError:
+            raise
         except Exception as exc:
             logger.exception("Translation chunk failed")
             return f"[Translation error: {exc}]"
-
-    def _handle_content_filter(self, chunk: str, depth: int, reason: str) -> str:
-        can_retry = depth < self._max_filter_depth and len(chunk) > 200
-        parts: List[str] = []
-        if can_retry:
-            parts = self._split_for_filter(chunk)
-            can_retry = len(parts) > 1
-
-        log_fn = logger.info if can_retry else logger.warning
-        log_fn(
-            "Content filter blocked translation (depth={}, chars={}): {}",
-            depth,
-            len(chunk),
-            self._summarize_filter_reason(reason),
-        )
-
-        if not can_retry:
-            return "[Translation skipped: blocked by Azure content filter]"
-
-        translations = [
-            self._translate_chunk(part, _depth=depth + 1) for part in parts if part
-        ]
-        combined = "\n\n".join(part for part in translations if part).strip()
-        return combined or "[Translation skipped: blocked by Azure content filter]"
+        self._cache_put(chunk, content)
+        return content
 
     def _chunk_text(self, text: str) -> List[str]:
         if len(text) <= self.max_chars:
             return [text]
+        if "\n\n" not in text:
+            # A single paragraph: no packing to do.
+            return self._split_long_text(text.strip())
 
         chunks: List[str] = []
-        current: List[str] = []
-        current_len = 0
-
-        def flush_current():
-            nonlocal current, current_len
-            if current:
-                chunks.append("\n\n".join(current).strip())
-            current = []
-            current_len = 0
-
-        paragraphs = [p for p in text.split("\n\n") if p.strip()]
-        for paragraph in paragraphs:
-            para = paragraph.strip()
-            para_len = len(para)
-            if para_len > self.max_chars:
-                flush_current()
-                chunks.extend(self._split_long_text(para))
-                continue
-
-            if current_len == 0:
-                current = [para]
-                current_len = para_len
-                continue
-
-            projected_len = current_len + 2 + para_len  # account for double newline
-            if projected_len <= self.max_chars:
-                current.append(para)
-                current_len = projected_len
+        run: List[Tuple[int, int]] = []
+        for match in _PARAGRAPH.finditer(text):
+            if match.end() - match.start() > self.max_chars:
+                chunks.extend(text[start:end] for start, end in self._pack_paragraphs(run))
+                run = []
+                chunks.extend(self._split_long_text(match.group()))
             else:
-                flush_current()
-                current = [para]
-                current_len = para_len
-
-        flush_current()
+                run.append(match.span())
+        chunks.extend(text[start:end] for start, end in self._pack_paragraphs(run))
         return chunks
 
-    def _split_for_filter(self, text: str) -> List[str]:
-        paragraphs = [p.strip() for p in text.split("\n\n") if p.strip()]
-        if len(paragraphs) > 1:
-            mid = len(paragraphs) // 2
-            first = "\n\n".join(paragraphs[:mid]).strip()
-            second = "\n\n".join(paragraphs[mid:]).strip()
-            return [part for part in (first, second) if part]
+    def _pack_paragraphs(self, spans: Sequence[Tuple[int, int]]) -> List[Tuple[int, int]]:
+        # Optimal-fit packing: fewest chunks first, then the smallest sum of squared slack,
+        # so a long post is not left with a tiny (but still billed) trailing request.
+        best: List[Optional[Tuple[int, int]]] = [(0, 0)] + [None] * len(spans)
+        back = [0] * (len(spans) + 1)
+        for i in range(1, len(spans) + 1):
+            end = spans[i - 1][1]
+            for j in range(i - 1, -1, -1):
+                length = end - spans[j][0]
+                if length > self.max_chars:
+                    break
+                count, cost = best[j]
+                candidate = (count + 1, cost + (self.max_chars - length) ** 2)
+                if best[i] is None or candidate < best[i]:
+                    best[i] = candidate
+                    back[i] = j
+
+        packed: List[Tuple[int, int]] = []
+        i = len(spans)
+        while i > 0:
+            j = back[i]
+            packed.append((spans[j][0], spans[i - 1][1]))
+            i = j
+        packed.reverse()
+        return packed
+
+    def _split_for_filter(
+        self, text: str, spans: Optional[List[Tuple[int, int]]] = None
+    ) -> List[Tuple[str, List[Tuple[int, int]]]]:
+        # Returns each half with its own paragraph spans, rebased to the half.
+        if spans is None:
+            spans = [match.span() for match in _PARAGRAPH.finditer(text)]
+        if len(spans) > 1:
+            mid = len(spans) // 2
+            halves = []
+            for half in (spans[:mid], spans[mid:]):
+                base = half[0][0]
+                halves.append(
+                    (text[base : half[-1][1]], [(start - base, end - base) for start, end in half])
+                )
+            return halves
 
         midpoint = max(len(text) // 2, 1)
         split_at = text.rfind(" ", 0, midpoint)
@@ -166,9 +476,30 @@ class AzureTranslator:
             split_at = midpoint
         first = text[:split_at].strip()
         second = text[split_at:].strip()
-        return [part for part in (first, second) if part]
+        return [(part, [(0, len(part))]) for part in (first, second) if part]
 
     def _split_long_text(self, text: str) -> List[str]:
+        # Break between sentences where possible; mid-sentence cuts cost translation quality.
+        pieces: List[str] = []
+        window_start = window_end = 0
+        sentence_start = 0
+        boundaries = [(m.start(), m.end()) for m in self._SENT.finditer(text)]
+        boundaries.append((len(text), len(text)))
+        for sentence_end, next_start in boundaries:
+            if sentence_end - window_start > self.max_chars:
+                if window_end > window_start:
+                    pieces.append(text[window_start:window_end].strip())
+                window_start = sentence_start
+                if sentence_end - sentence_start > self.max_chars:
+                    pieces.extend(self._split_on_spaces(text[sentence_start:sentence_end]))
+                    window_start = next_start
+            window_end = sentence_end
+            sentence_start = next_start
+        if window_end > window_start:
+            pieces.append(text[window_start:window_end].strip())
+        return [piece for piece in pieces if piece]
+
+    def _split_on_spaces(self, text: str) -> List[str]:
         pieces: List[str] = []
         start = 0
         length = len(text)
@@ -176,8 +507,9 @@ class AzureTranslator:
             end = min(start + self.max_chars, length)
             # try to backtrack to nearest space to avoid breaking tokens
             if end < length:
-                space = text.rfind(" ", start, end)
-                if space > start + 20:
+                # Only a space past start + 20 is accepted, so don't scan the head of the window.
+                space = text.rfind(" ", start + 21, end)
+                if space != -1:
                     end = space
             pieces.append(text[start:end].strip())
             start = end
@@ -186,8 +518,9 @@ class AzureTranslator:
     def _is_content_filter_error(self, exc: Exception) -> bool:
         if not isinstance(exc, BadRequestError):
             return False
+        response = getattr(exc, "response", None)
         try:
-            data = exc.response.json() if exc.response else None
+            data = json_loads(response.content) if response is not None else None
         except Exception:
             data = None
 
@@ -196,7 +529,7 @@ class AzureTranslator:
             code = (error.get("code") or "").lower()
             inner = error.get("innererror") or {}
             inner_code = (inner.get("code") or "").lower()
-            if "content_filter" in code or "responsibleaipolicyviolation" in inner_code:
+            if code in _FILTER_CODES or inner_code in _FILTER_CODES:
                 return True
         return "content_filter" in str(exc).lower()
 
@@ -2,32 +2,43 @@ from __future__ import annotations
 
 import argparse
 import sys
-from typing import Iterable
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Iterable, Optional
 
 import feedparser
 from loguru import logger
 
+from feeds import REQUEST_TIMEOUT, _get_session
 from main import load_feed_urls_from_file
 
+MAX_WORKERS = 32
+
 
 def iter_feed_urls(feed_list: str) -> Iterable[str]:
     urls = load_feed_urls_from_file(feed_list)
     if not urls:
         raise ValueError(f"No feed URLs found in {feed_list}")
-    seen: set[str] = set()
-    for url in urls:
-        if url in seen:
-            continue
-        seen.add(url)
-        yield url
+    yield from dict.fromkeys(urls)
 
 
-def validate_feed(url: str) -> tuple[str, int, str]:
+FetchResult = tuple[Optional[bytes], dict[str, str], str]
+
+
+def fetch_feed(url: str) -> FetchResult:
     try:
-        feed = feedparser.parse(url)
+        # Bounded by REQUEST_TIMEOUT; feedparser's own fetcher has no timeout.
+        response = _get_session().get(url, timeout=REQUEST_TIMEOUT)
+        response.raise_for_status()
     except Exception as exc:  # pragma: no cover - network dependent
-        return ("error", 0, f"request failed: {exc}")
+        return (None, {}, f"request failed: {exc}")
 
+    response_headers = {key.lower(): value for key, value in response.headers.items()}
+    response_headers.setdefault("content-location", response.url)
+    return (response.content, response_headers, "")
+
+
+def check_feed(content: bytes, response_headers: dict[str, str]) -> tuple[str, int, str]:
+    feed = feedparser.parse(content, response_headers=response_headers)
     entries = len(getattr(feed, "entries", []) or [])
     if feed.bozo and not entries:
         return ("error", entries, f"parse error: {feed.bozo_exception}")
@@ -38,6 +49,33 @@ def validate_feed(url: str) -> tuple[str, int, str]:
     return ("ok", entries, "")
 
 
+def validate_feed(url: str) -> tuple[str, int, str]:
+    content, response_headers, error = fetch_feed(url)
+    if content is None:
+        return ("error", 0, error)
+    return check_feed(content, response_headers)
+
+
+def validate_feeds(urls: list[str]) -> list[tuple[str, int, str]]:
+    # Fetching is I/O bound (threads); parsing is CPU bound, so it runs in worker processes.
+    with ThreadPoolExecutor(max_workers=max(1, min(MAX_WORKERS, len(urls)))) as executor:
+        fetched = list(executor.map(fetch_feed, urls))
+
+    results: list[tuple[str, int, str]] = [("error", 0, error) for _, _, error in fetched]
+    downloaded = [index for index, (content, _, _) in enumerate(fetched) if content is not None]
+    if downloaded:
+        with ProcessPoolExecutor() as executor:
+            checked = executor.map(
+                check_feed,
+                [fetched[index][0] for index in downloaded],
+                [fetched[index][1] for index in downloaded],
+                chunksize=4,
+            )
+            for index, result in zip(downloaded, checked):
+                results[index] = result
+    return results
+
+
 def main() -> int:
     parser = argparse.ArgumentParser(
         description="Validate every feed URL from the configured feed list",
@@ -56,8 +94,7 @@ def main() -> int:
         return 1
 
     ok = warn = err = 0
-    for url in urls:
-        status, count, message = validate_feed(url)
+    for url, (status, count, message) in zip(urls, validate_feeds(urls)):
         if status == "ok":
             ok += 1
             logger.info(f"[OK] {url} ({count} entries)")
@@ -69,13 +106,7 @@ def main() -> int:
             logger.error(f"[ERROR] {url} - {message}")
 
     total = len(urls)
-    logger.info(
-        "Validation summary: %s total • %s ok • %s warn • %s error",
-        total,
-        ok,
-        warn,
-        err,
-    )
+    logger.info(f"Validation summary: {total} total • {ok} ok • {warn} warn • {err} error")
     return 0 if err == 0 else 2
 
 